@@ -0,0 +1,99 @@
+import lxml.html
+from lxml import etree
+from urllib.parse import urljoin, urlparse
+from functools import lru_cache
+import codecs
+
+# Link targets that are never HTML, so not worth a request
+NON_HTML_EXTENSIONS = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.ico', '.zip', '.mp4',
+    '.css', '.js', '.woff', '.woff2'
+)
+
+# Elements whose text never shows up on the rendered page
+NON_CONTENT_TAGS = ('script', 'style', 'noscript', 'template')
+
+# Plain str results, so link lists don't keep the parsed tree alive
+HREF_XPATH = etree.XPath('//a/@href', smart_strings=False)
+
+# Helper functions
+@lru_cache(maxsize=16384)
+def parse_url(url):
+    """Parse a URL once; validity and domain checks share the result"""
+    return urlparse(url)
+
+def is_valid_url(url):
+    """Check if URL is valid and has HTTP scheme"""
+    try:
+        result = parse_url(url)
+        return all([result.scheme, result.netloc])
+    except:
+        return False
+
+def get_domain(url):
+    """Extract domain from URL"""
+    return parse_url(url).netloc
+
+def has_non_html_extension(url):
+    """Check if URL path ends in a known non-HTML file extension"""
+    return parse_url(url).path.lower().endswith(NON_HTML_EXTENSIONS)
+
+def choose_encoding(body, declared):
+    """Pick the charset to parse a body with, or None to let lxml sniff it"""
+    # The Content-Type charset wins over anything inside the page,
+    # unless it names an encoding nobody knows
+    if declared:
+        try:
+            codecs.lookup(declared)
+            return declared
+        except LookupError:
+            pass
+    # Otherwise prefer UTF-8 whenever the bytes allow it; libxml2's own
+    # fallback is Latin-1. final=False tolerates a char cut by MAX_BYTES
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(body, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return None
+
+def parse_html(url, body, base_domain, include_external, encoding=None):
+    """Extract title, visible text and crawlable links from an HTML body"""
+    try:
+        parser = lxml.html.HTMLParser(encoding=choose_encoding(body, encoding))
+    except LookupError:
+        # Charset Python knows but libxml2 doesn't: fall back to meta/BOM sniffing
+        parser = None
+    try:
+        tree = lxml.html.fromstring(body, parser=parser)
+    except etree.ParserError:
+        # Empty, whitespace-only or comment-only page: a valid, blank document
+        return {
+            'title': "No Title",
+            'content': '',
+            'links': ()
+        }
+    
+    # Remove script, style and other non-content elements in one pass
+    etree.strip_elements(tree, *NON_CONTENT_TAGS, with_tail=False)
+    
+    # Extract text content, keeping a space between adjacent elements' text
+    title = tree.findtext('.//title') or "No Title"
+    text_content = ' '.join(
+        word for text in tree.itertext() for word in text.split()
+    )[:5000]  # Limit content size
+    
+    # Extract links, dropping other domains here so the crawler never sees them.
+    # Hosts are case-insensitive; parse_url is cached, so this is a lookup
+    base_domain = base_domain.lower()
+    links = tuple(
+        full_url for full_url in (urljoin(url, href) for href in HREF_XPATH(tree))
+        if is_valid_url(full_url)
+        and not has_non_html_extension(full_url)
+        and (include_external or get_domain(full_url).lower() == base_domain)
+    )
+    
+    return {
+        'title': title,
+        'content': text_content,
+        'links': links
+    }
@@ -1,11 +1,19 @@
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+import httpx
+from urllib.parse import urlunparse
+import asyncio
+import os
+import socket
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from collections import deque
+from functools import lru_cache
 import pandas as pd
 from io import BytesIO
+from openpyxl import Workbook
+import uuid
+from page_parser import parse_html, parse_url, is_valid_url, get_domain
 
 # Streamlit configuration
 st.set_page_config(page_title="Web Scraper", layout="wide")
@@ -18,6 +26,33 @@ max_pages = st.sidebar.slider("Max Pages to Scrape:", 1, 100, 10)
 delay = st.sidebar.slider("Delay Between Requests (seconds):", 0.0, 2.0, 0.5, 0.1)
 include_external = st.sidebar.checkbox("Include External Links", False)
 
+# Crawl concurrency
+MAX_WORKERS = 16
+MAX_REQUESTS_PER_HOST = 10
+MAX_PARSE_WORKERS = 4
+
+# Progress is pushed every PROGRESS_INTERVAL seconds or every N pages
+PROGRESS_INTERVAL = 0.2
+PROGRESS_EVERY_PAGES = 10
+
+# Per-page download limits
+MAX_BYTES = 2_000_000
+CHUNK_SIZE = 64 * 1024
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# DNS cache: seconds a resolved address is reused, and most lookups kept
+DNS_CACHE_TTL = 300
+DNS_CACHE_SIZE = 1024
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    # httpx decodes br only when the brotli package is installed
+    'Accept-Encoding': 'gzip, br, deflate'
+}
+
+# Per-crawl results kept in st.cache_data; older crawls are evicted
+RESULTS_CACHE_ENTRIES = 8
+
 # Session state initialization
 if 'scraped_data' not in st.session_state:
     st.session_state.scraped_data = []
@@ -25,51 +60,120 @@ if 'visited_urls' not in st.session_state:
     st.session_state.visited_urls = set()
 if 'queue' not in st.session_state:
     st.session_state.queue = deque()
+if 'enqueued' not in st.session_state:
+    st.session_state.enqueued = set()
+if 'crawl_id' not in st.session_state:
+    st.session_state.crawl_id = None
+if 'success_count' not in st.session_state:
+    st.session_state.success_count = 0
 
-# Helper functions
-def is_valid_url(url):
-    """Check if URL is valid and has HTTP scheme"""
-    try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except:
-        return False
+@st.cache_resource
+def install_dns_cache():
+    """Cache getaddrinfo results so each host is resolved once per TTL"""
+    # httpx resolves through loop.getaddrinfo, which calls socket.getaddrinfo;
+    # cache_resource keeps reruns from wrapping it more than once
+    resolve = socket.getaddrinfo
+    cache = {}
+    lock = threading.Lock()
+    
+    def cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with lock:
+            entry = cache.get(key)
+        if entry is not None and now - entry[0] < DNS_CACHE_TTL:
+            return list(entry[1])
+        result = resolve(host, port, family, type, proto, flags)
+        with lock:
+            # Keep entries in resolve order, so the oldest (and any expired
+            # ones) sit at the front; evict those and cap the size
+            cache.pop(key, None)
+            while cache:
+                oldest = next(iter(cache))
+                if (len(cache) < DNS_CACHE_SIZE
+                        and now - cache[oldest][0] < DNS_CACHE_TTL):
+                    break
+                del cache[oldest]
+            cache[key] = (now, result)
+        return list(result)
+    
+    socket.getaddrinfo = cached_getaddrinfo
+    return cache
 
-def get_domain(url):
-    """Extract domain from URL"""
-    return urlparse(url).netloc
+install_dns_cache()
 
-def scrape_page(url):
+def create_client():
+    """Create an HTTP/2 client; requests to one host share a connection"""
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        retries=2
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        headers=HEADERS,
+        timeout=10.0,
+        follow_redirects=True
+    )
+
+@st.cache_resource
+def get_parse_executor():
+    """Create the thread pool that parses downloaded pages"""
+    # Threads, not processes: a spawned worker re-runs this whole script as
+    # __mp_main__, and lxml releases the GIL while it parses anyway
+    return ThreadPoolExecutor(
+        max_workers=min(MAX_PARSE_WORKERS, os.cpu_count() or 1),
+        thread_name_prefix='parse'
+    )
+
+# Helper functions
+@lru_cache(maxsize=16384)
+def canonicalize_url(url):
+    """Normalize URL so trivially different spellings dedupe to one page"""
+    result = parse_url(url)
+    return urlunparse((
+        result.scheme.lower(),
+        result.netloc.lower(),
+        result.path.rstrip('/') or '/',
+        result.params,
+        result.query,
+        ''
+    ))
+
+async def scrape_page(client, url, base_domain, include_external):
     """Scrape a single page and extract content"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Extract text content
-        title = soup.title.string if soup.title else "No Title"
-        text_content = soup.get_text(separator=' ', strip=True)[:5000]  # Limit content size
+        async with client.stream('GET', url) as response:
+            response.raise_for_status()
+            
+            # Don't download images, archives and other binary links
+            content_type = response.headers.get('Content-Type', '')
+            if not content_type.lower().startswith(HTML_CONTENT_TYPES):
+                return {
+                    'url': url,
+                    'title': "Skipped",
+                    'content': f"Skipped non-HTML content ({content_type or 'unknown type'})",
+                    'links': (),
+                    'status': response.status_code
+                }
+            
+            # Read the body in chunks and stop at the size cap
+            body = bytearray()
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                body += chunk
+                if len(body) >= MAX_BYTES:
+                    break
         
-        # Extract links
-        links = []
-        for link in soup.find_all('a', href=True):
-            full_url = urljoin(url, link['href'])
-            if is_valid_url(full_url):
-                links.append(full_url)
+        # Parse off the event loop so other workers keep fetching
+        loop = asyncio.get_running_loop()
+        page = await loop.run_in_executor(
+            get_parse_executor(), parse_html, url, bytes(body[:MAX_BYTES]),
+            base_domain, include_external, response.charset_encoding
+        )
         
         return {
             'url': url,
-            'title': title,
-            'content': text_content,
-            'links': links,
+            **page,
             'status': response.status_code
         }
     except Exception as e:
@@ -77,44 +181,151 @@ def scrape_page(url):
             'url': url,
             'title': "Error",
             'content': f"Error scraping page: {str(e)}",
-            'links': [],
+            'links': (),
             'status': 0
         }
 
-def process_queue(base_domain):
+async def crawl(base_domain, include_external, progress_bar, status_text):
+    """Drain the queue with a pool of concurrent workers"""
+    queue = asyncio.Queue()
+    while st.session_state.queue:
+        queue.put_nowait(st.session_state.queue.popleft())
+    
+    # Cap in-flight requests per host so concurrency stays polite, and
+    # start requests to the same host at least `delay` seconds apart
+    loop = asyncio.get_running_loop()
+    host_limits = {}
+    next_start = {}
+    
+    # Each UI update is a websocket message, so batch them
+    last_update = 0.0
+    
+    def report_progress(current_url):
+        nonlocal last_update
+        now = time.monotonic()
+        pages = len(st.session_state.visited_urls)
+        if now - last_update < PROGRESS_INTERVAL and pages % PROGRESS_EVERY_PAGES:
+            return
+        last_update = now
+        status_text.text(f"Scraping: {current_url}")
+        progress_bar.progress(min(pages / max_pages, 1.0))
+    
+    async def worker():
+        while True:
+            current_url = await queue.get()
+            try:
+                canonical_url = canonicalize_url(current_url)
+                if (canonical_url in st.session_state.visited_urls
+                        or len(st.session_state.visited_urls) >= max_pages):
+                    continue
+                
+                st.session_state.visited_urls.add(canonical_url)
+                report_progress(current_url)
+                
+                # Scrape the page
+                host = get_domain(current_url).lower()
+                limit = host_limits.setdefault(host, asyncio.Semaphore(MAX_REQUESTS_PER_HOST))
+                async with limit:
+                    # Respect delay: reserve this host's next start slot
+                    now = loop.time()
+                    start_at = max(now, next_start.get(host, now))
+                    next_start[host] = start_at + delay
+                    await asyncio.sleep(start_at - now)
+                    page_data = await scrape_page(
+                        client, current_url, base_domain, include_external
+                    )
+                st.session_state.scraped_data.append(page_data)
+                if page_data['status'] == 200:
+                    st.session_state.success_count += 1
+                
+                # Add new links to queue (already filtered by domain),
+                # skipping anything already queued (dict keeps page order)
+                new_links = {}
+                for link in page_data['links']:
+                    canonical_link = canonicalize_url(link)
+                    if (canonical_link not in st.session_state.enqueued
+                            and canonical_link not in new_links):
+                        new_links[canonical_link] = link
+                st.session_state.enqueued.update(new_links)
+                for link in new_links.values():
+                    queue.put_nowait(link)
+            finally:
+                queue.task_done()
+    
+    async with create_client() as client:
+        workers = [asyncio.create_task(worker()) for _ in range(MAX_WORKERS)]
+        drained = asyncio.create_task(queue.join())
+        try:
+            # Workers only finish by raising (e.g. Streamlit's Stop/Rerun
+            # from a progress update), so stop on whichever comes first
+            done, _ = await asyncio.wait(
+                [drained, *workers], return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for task in [drained, *workers]:
+                task.cancel()
+            await asyncio.wait([drained, *workers])
+        
+        # Re-raise a worker failure so it aborts the crawl like the old loop
+        for task in done:
+            if task is not drained and not task.cancelled():
+                task.result()
+
+def process_queue(base_domain, include_external):
     """Process the scraping queue"""
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    while st.session_state.queue and len(st.session_state.visited_urls) < max_pages:
-        current_url = st.session_state.queue.popleft()
-        
-        if current_url in st.session_state.visited_urls:
-            continue
-            
-        st.session_state.visited_urls.add(current_url)
-        status_text.text(f"Scraping: {current_url}")
-        
-        # Scrape the page
-        page_data = scrape_page(current_url)
-        st.session_state.scraped_data.append(page_data)
-        
-        # Add new links to queue if they belong to the same domain
-        for link in page_data['links']:
-            if link not in st.session_state.visited_urls:
-                if include_external or get_domain(link) == base_domain:
-                    st.session_state.queue.append(link)
-        
-        # Update progress
-        progress = len(st.session_state.visited_urls) / max_pages
-        progress_bar.progress(min(progress, 1.0))
-        
-        # Respect delay
-        time.sleep(delay)
+    asyncio.run(crawl(base_domain, include_external, progress_bar, status_text))
     
     progress_bar.empty()
     status_text.empty()
 
+@st.cache_data(show_spinner=False, max_entries=RESULTS_CACHE_ENTRIES)
+def build_results_frame(signature, _data):
+    """Build the results DataFrame once per crawl, not on every rerun"""
+    df = pd.DataFrame(_data)
+    # Flatten links to one string so every text column is Arrow-backed
+    df['links'] = df['links'].map(';'.join)
+    return df.astype({
+        'url': 'string[pyarrow]',
+        'title': 'string[pyarrow]',
+        'content': 'string[pyarrow]',
+        'links': 'string[pyarrow]'
+    })
+
+@st.cache_data(show_spinner=False, max_entries=RESULTS_CACHE_ENTRIES)
+def build_excel_report(signature, _df):
+    """Serialize results to xlsx bytes once per crawl, not on every rerun"""
+    # Both writers stream row by row, so cells must be plain scalars
+    header = list(_df.columns)
+    rows = (
+        [value if isinstance(value, (str, int, float)) else str(value) for value in row]
+        for row in _df.itertuples(index=False)
+    )
+    
+    excel_buffer = BytesIO()
+    # Try to use xlsxwriter if available, otherwise fallback to openpyxl
+    try:
+        import xlsxwriter
+        
+        # constant_memory flushes each row as soon as the next one starts
+        workbook = xlsxwriter.Workbook(excel_buffer, {'constant_memory': True})
+        sheet = workbook.add_worksheet('Scraped Data')
+        sheet.write_row(0, 0, header)
+        for row_num, row in enumerate(rows, start=1):
+            sheet.write_row(row_num, 0, row)
+        workbook.close()
+    except ImportError:
+        # Fallback to openpyxl
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Scraped Data')
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        workbook.save(excel_buffer)
+    return excel_buffer.getvalue()
+
 # Main scraping logic
 if st.sidebar.button("🚀 Start Scraping"):
     if not base_url:
@@ -124,11 +335,14 @@ if st.sidebar.button("🚀 Start Scraping"):
     else:
         # Reset session state
         st.session_state.scraped_data = []
+        st.session_state.success_count = 0
         st.session_state.visited_urls = set()
         st.session_state.queue = deque([base_url])
+        st.session_state.enqueued = {canonicalize_url(base_url)}
+        st.session_state.crawl_id = uuid.uuid4().hex
         
         base_domain = get_domain(base_url)
-        process_queue(base_domain)
+        process_queue(base_domain, include_external)
         
         st.success(f"Scraping completed! Visited {len(st.session_state.visited_urls)} pages.")
 
@@ -136,16 +350,16 @@ if st.sidebar.button("🚀 Start Scraping"):
 if st.session_state.scraped_data:  # Fixed the condition
     st.header("📊 Scraping Results")
     
-    # Summary metrics
+    # Summary metrics (counted during the crawl, so no rescan per rerun)
+    pages_scraped = len(st.session_state.scraped_data)
     col1, col2, col3 = st.columns(3)
-    col1.metric("Pages Scraped", len(st.session_state.scraped_data))
-    col2.metric("Successful Requests", 
-                len([d for d in st.session_state.scraped_data if d['status'] == 200]))
-    col3.metric("Error Pages", 
-                len([d for d in st.session_state.scraped_data if d['status'] != 200]))
+    col1.metric("Pages Scraped", pages_scraped)
+    col2.metric("Successful Requests", st.session_state.success_count)
+    col3.metric("Error Pages", pages_scraped - st.session_state.success_count)
     
     # Data table
-    df = pd.DataFrame(st.session_state.scraped_data)
+    results_signature = (st.session_state.crawl_id, pages_scraped)
+    df = build_results_frame(results_signature, st.session_state.scraped_data)
     st.subheader("📄 Scraped Pages")
     
     # Create a copy for display with clickable URLs
@@ -157,46 +371,41 @@ if st.session_state.scraped_data:  # Fixed the condition
     
     # Detailed view
     st.subheader("🔍 Detailed Content")
-    for i, page in enumerate(st.session_state.scraped_data):
-        with st.expander(f"{page['title']} - {page['url']}"):
-            st.write(f"**Status Code:** {page['status']}")
-            st.write(f"**Content Preview:**")
-            st.text_area("", page['content'], height=200, key=f"content_{i}")
-            st.write(f"**Links Found:** {len(page['links'])}")
-            
-            # Show first 10 links
-            if page['links']:
-                links_html = "<br>".join([
-                    f'<a href="{link}" target="_blank">{link}</a>' 
-                    for link in page['links'][:10]
-                ])
-                if len(page['links']) > 10:
-                    links_html += "<br>...and more"
-                st.markdown(links_html, unsafe_allow_html=True)
-            else:
-                st.write("No links found")
+    # Render one page at a time instead of a widget pair per scraped page
+    data = st.session_state.scraped_data
+    page_idx = st.selectbox(
+        "Page",
+        range(len(data)),
+        format_func=lambda i: f"{data[i]['title']} - {data[i]['url']}"
+    )
+    page = data[page_idx]
+    with st.expander(f"{page['title']} - {page['url']}", expanded=True):
+        st.write(f"**Status Code:** {page['status']}")
+        st.write(f"**Content Preview:**")
+        st.text_area("", page['content'], height=200, key=f"content_{page_idx}")
+        st.write(f"**Links Found:** {len(page['links'])}")
+        
+        # Show first 10 links
+        if page['links']:
+            links_html = "<br>".join([
+                f'<a href="{link}" target="_blank">{link}</a>' 
+                for link in page['links'][:10]
+            ])
+            if len(page['links']) > 10:
+                links_html += "<br>...and more"
+            st.markdown(links_html, unsafe_allow_html=True)
+        else:
+            st.write("No links found")
     
     # Export functionality
     st.subheader("💾 Export Report")
     
-    # Try to use xlsxwriter if available, otherwise fallback to openpyxl
-    try:
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Scraped Data')
-        excel_buffer.seek(0)
-        mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    except ImportError:
-        # Fallback to openpyxl
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Scraped Data')
-        excel_buffer.seek(0)
-        mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    excel_data = build_excel_report(results_signature, df)
+    mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     
     st.download_button(
         label="📥 Download Excel Report",
-        data=excel_buffer,
+        data=excel_data,
         file_name="web_scraping_report.xlsx",
         mime=mime_type
     )